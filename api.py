@@ -0,0 +1,380 @@
+"""
+Lightweight HTTP API serving the aggregated series computed for the Streamlit app.
+
+The source data is downloaded and joined once per process; every request is then
+answered from memory, with responses cached, tagged with an ETag and gzipped
+when the client accepts it.
+
+    python api.py --port 8502
+
+Endpoints:
+
+- ``/series``: aggregated series as JSON, or Arrow IPC stream with ``format=arrow``
+  (or ``Accept: application/vnd.apache.arrow.stream``). Parameters are
+  ``country`` (name or ISO code), ``level`` (national, provincial, city or custom),
+  repeated ``area`` values, or for the custom level repeated ``group1_province``,
+  ``group1_city``, ``group2_province`` and ``group2_city`` values, ``metric``
+  (mobility or staying_put) and optional ``start``/``end`` dates.
+- ``/areas``: names available for ``country`` at ``level``.
+- ``/stats``: response cache statistics.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import mobility
+from cache import LRUCache
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+countries = {
+    **{name: name for name in mobility.c_dict},
+    **{code: name for name, code in mobility.c_dict.items()},
+}
+levels = {
+    "national": "National level",
+    "provincial": "Provincial level",
+    "city": "City/municipality level",
+    "custom": "Custom",
+}
+metrics = {
+    "mobility": "Mobility change",
+    "staying_put": "Staying put/sheltering in place",
+}
+timor_areas = ["Dili Barat", "Dili Timur"]
+
+
+def load_sources():
+    """
+    Runs the same ingestion as the Streamlit app and returns the facebook data,
+    government responses, typhoons and a version string identifying them.
+    """
+    urls = mobility.download_from_hdx()
+    fb = mobility.facebook_data_reader(urls)
+    g = mobility.government_response_reader()
+    pac = mobility.read_pacific_typhoons().reset_index()
+    return fb, g, pac, mobility.data_version(urls, g, pac)
+
+
+class MobilityData:
+    """
+    Holds the ingested sources and answers series queries against them.
+
+    ``loader`` returns ``(fb, g, pac, version)``; it defaults to the live sources
+    and can be swapped for local stand-in data.
+    """
+
+    def __init__(self, loader=load_sources):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._sources = None
+        self._countries = {}
+
+    def sources(self):
+        with self._lock:
+            if self._sources is None:
+                self._sources = self._loader()
+            return self._sources
+
+    @property
+    def version(self):
+        return self.sources()[3]
+
+    def country_frame(self, country):
+        fb = self.sources()[0]
+        with self._lock:
+            if country not in self._countries:
+                self._countries[country] = mobility.facebook_data_filter(fb, country)
+            return self._countries[country]
+
+    def areas(self, country, level):
+        if country == "Timor Leste":
+            return timor_areas
+        if level == "Custom":
+            raise ValueError("list areas for the provincial or city level instead")
+        column = mobility.level_columns[country][level]
+        return sorted(self.country_frame(country)[column].dropna().unique().tolist())
+
+    def series(self, query):
+        """
+        Aggregated series for a parsed query, with columns ds, area, value and
+        policy_stringency.
+        """
+        fb, g, pac, _ = self.sources()
+        df = self.country_frame(query["country"])
+        country = query["country"]
+        if country == "Timor Leste":
+            data, _ = mobility.aggregate_timor_leste(df, g, pac, query["areas"])
+            column = "polygon_name"
+        elif query["level"] == "Custom":
+            data, _ = mobility.aggregate_comparison_groups(
+                df, g, pac, country, *query["groups"]
+            )
+            column = "status"
+        else:
+            areas = query["areas"]
+            if query["level"] == "National level":
+                areas = [mobility.c_dict[country]]
+            data, _ = mobility.aggregate_areas(
+                df, g, pac, country, query["level"], areas
+            )
+            column = mobility.level_columns[country][query["level"]]
+        if query["start"] is not None:
+            data = data[data["ds"] >= query["start"]]
+        if query["end"] is not None:
+            data = data[data["ds"] <= query["end"]]
+        data = data[
+            ["ds", column, mobility.metric_dict[query["metric"]], "Policy Stringency"]
+        ]
+        data.columns = ["ds", "area", "value", "policy_stringency"]
+        return data.sort_values(["area", "ds"]).reset_index(drop=True)
+
+
+def _one(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"missing parameter: {name}")
+        return default
+    return values[-1]
+
+
+def _date(params, name):
+    """
+    Parses a date parameter; timezone-aware values are converted to naive UTC to
+    match the naive ``ds`` column.
+    """
+    if name not in params:
+        return None
+    try:
+        date = pd.Timestamp(_one(params, name))
+    except ValueError:
+        raise ValueError(f"invalid date for {name}: {_one(params, name)}")
+    if date.tzinfo is not None:
+        date = date.tz_convert(None)
+    return date
+
+
+def _qvalues(header):
+    """
+    Parses a comma-separated header such as Accept-Encoding into lowercased
+    tokens and their ``q`` weights; a weight that does not parse counts as 0.
+    """
+    qvalues = {}
+    for item in header.split(","):
+        token, *params = [part.strip() for part in item.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[token.lower()] = q
+    return qvalues
+
+
+def accepts_gzip(header):
+    qvalues = _qvalues(header)
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+
+def etag_matches(header, etag):
+    """
+    Weak comparison of ``etag`` against an If-None-Match list, where ``*``
+    matches any representation.
+    """
+
+    def opaque(tag):
+        return tag[2:] if tag.startswith("W/") else tag
+
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or opaque(etag) in map(opaque, tags)
+
+
+def parse_query(params):
+    """
+    Validates ``/series`` parameters into a canonical, hashable-friendly dict.
+    """
+    country = countries.get(_one(params, "country"))
+    if country is None:
+        raise ValueError(f"unknown country: {_one(params, 'country')}")
+    level = levels.get(_one(params, "level", "national"))
+    if level is None:
+        raise ValueError(f"unknown level: {_one(params, 'level')}")
+    metric = metrics.get(_one(params, "metric", "mobility"))
+    if metric is None:
+        raise ValueError(f"unknown metric: {_one(params, 'metric')}")
+    query = {
+        "country": country,
+        "level": level,
+        "metric": metric,
+        "areas": tuple(sorted(set(params.get("area", [])))),
+        "groups": tuple(
+            tuple(sorted(set(params.get(name, []))))
+            for name in (
+                "group1_province",
+                "group1_city",
+                "group2_province",
+                "group2_city",
+            )
+        ),
+        "start": _date(params, "start"),
+        "end": _date(params, "end"),
+    }
+    if country == "Timor Leste" or level not in ("National level", "Custom"):
+        if not query["areas"]:
+            raise ValueError("at least one area is required")
+    return query
+
+
+def query_key(query):
+    return tuple(
+        (name, str(value) if name in ("start", "end") else value)
+        for name, value in sorted(query.items())
+    )
+
+
+def encode(data, fmt):
+    if fmt == "arrow":
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return data.to_json(orient="records", date_format="iso").encode("utf-8")
+
+
+def make_handler(store, response_cache, max_age=300):
+    """
+    Builds the request handler class bound to a data store and response cache.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            try:
+                if url.path == "/series":
+                    self.series(params)
+                elif url.path == "/areas":
+                    country = countries.get(_one(params, "country"))
+                    level = levels.get(_one(params, "level", "provincial"))
+                    if country is None or level is None:
+                        raise ValueError("unknown country or level")
+                    body = json.dumps(store.areas(country, level)).encode("utf-8")
+                    self.respond(body, "application/json")
+                elif url.path == "/stats":
+                    body = json.dumps(
+                        {"version": store.version, "cache": response_cache.stats()}
+                    ).encode("utf-8")
+                    self.respond(body, "application/json", cacheable=False)
+                else:
+                    self.error(404, "not found")
+            except ValueError as e:
+                self.error(400, str(e))
+            except Exception:
+                self.log_error("%s", traceback.format_exc())
+                self.error(500, "internal server error")
+
+        def series(self, params):
+            fmt = _one(params, "format", "")
+            if not fmt:
+                accept = _qvalues(self.headers.get("Accept", ""))
+                fmt = "arrow" if accept.get(ARROW_MIME, 0.0) > 0 else "json"
+            if fmt not in ("json", "arrow"):
+                raise ValueError(f"unknown format: {fmt}")
+            if fmt == "arrow" and pa is None:
+                self.error(406, "arrow output requires pyarrow")
+                return
+            query = parse_query(params)
+            key = (store.version, query_key(query), fmt)
+            body = response_cache.get_or_create(
+                key, lambda: encode(store.series(query), fmt)
+            )
+            mime = ARROW_MIME if fmt == "arrow" else "application/json"
+            self.respond(body, mime, key=key)
+
+        def respond(self, body, mime, key=None, cacheable=True):
+            etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+            if cacheable and etag_matches(self.headers.get("If-None-Match", ""), etag):
+                self.send_response(304)
+                self.cache_headers(etag, cacheable)
+                self.end_headers()
+                return
+            gzipped = (
+                accepts_gzip(self.headers.get("Accept-Encoding", ""))
+                and len(body) > 1024
+            )
+            if gzipped:
+                if key is None:
+                    body = gzip.compress(body)
+                else:
+                    body = response_cache.get_or_create(
+                        key + ("gzip",), lambda: gzip.compress(body)
+                    )
+            self.send_response(200)
+            self.send_header("Content-Type", mime)
+            self.send_header("Content-Length", str(len(body)))
+            self.cache_headers(etag, cacheable)
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def cache_headers(self, etag, cacheable):
+            """
+            Headers sent alike on 200 and 304, so caches keep the same policy.
+            """
+            self.send_header("Vary", "Accept, Accept-Encoding")
+            if cacheable:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", f"public, max-age={max_age}")
+            else:
+                self.send_header("Cache-Control", "no-store")
+
+        def error(self, status, message):
+            body = json.dumps({"error": message}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def make_server(host="127.0.0.1", port=8502, store=None, cache_bytes=128 * 1024 * 1024):
+    store = store or MobilityData()
+    response_cache = LRUCache(max_entries=512, max_bytes=cache_bytes)
+    return ThreadingHTTPServer((host, port), make_handler(store, response_cache))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument(
+        "--cache-mb", type=int, default=128, help="Response cache size in megabytes."
+    )
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, cache_bytes=args.cache_mb * 1024 * 1024)
+    print(f"Serving mobility series on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,34 @@
+import json
+
+import altair as alt
+
+# Specs embed their data, which is often over Altair's 5,000 row limit. The
+# transformer registry is process-global, so the limit is lifted once on import
+# rather than toggled around each build while other sessions are serializing.
+alt.data_transformers.disable_max_rows()
+
+
+def _names(areas):
+    return tuple(sorted(map(str, areas)))
+
+
+def chart_key(version, country, level, areas, metric, viz):
+    """
+    Cache key for one view of the chart.
+
+    ``areas`` lists the selected area names or, for the ``"Custom"`` level, the
+    four comparison group selections. Selection order does not change the key.
+    """
+    if level == "Custom":
+        areas = tuple(_names(group) for group in areas)
+    else:
+        areas = _names(areas)
+    return (version, country, level, areas, metric, tuple(sorted(viz)))
+
+
+def cached_chart_spec(cache, key, build):
+    """
+    Returns the Vega-Lite spec stored under ``key`` in ``cache``, calling
+    ``build`` for the Altair chart and serializing it only on a miss.
+    """
+    return json.loads(cache.get_or_create(key, lambda: build().to_json()))
@@ -0,0 +1,176 @@
+"""
+Synthetic stand-ins for the HDX, OxCGRT, typhoon and GADM sources.
+
+At ``scale=1`` the frames are about as large as the real VNM/PHL/TLS data
+(roughly 2,400 polygons over 22 months, ~1.6 million facebook rows), so memo
+hashing and copying costs are of the same order as in production.
+"""
+import numpy as np
+import pandas as pd
+
+import mobility
+
+DAYS = pd.date_range("2020-03-01", "2021-12-31")
+# Approximate number of admin-1 units and facebook polygons per country.
+SIZES = {"VNM": (63, 700), "PHL": (81, 1630), "TLS": (1, 65)}
+# Every area the app selects by default has to exist in the stand-in data.
+PROVINCES = {
+    "VNM": [
+        "Ha Noi",
+        "Thua Thien Hue",
+        "Da Nang",
+        "Ho Chi Minh",
+        "Quang Binh",
+        "Quang Ngai",
+    ],
+    "PHL": ["Metropolitan Manila", "Albay", "Catanduanes"],
+}
+CITIES = {
+    "VNM": ["Ha Giang", "Hue", "Quang Binh"],
+    "PHL": ["Quezon City", "Tuguegarao City", "Barili"],
+    "TLS": ["Dili Barat", "Dili Timur"],
+}
+AFFECTED = {
+    "Vietnam": ["Thua Thien Hue", "Quang Binh", "Quang Ngai"],
+    "the Philippines": ["Albay", "Catanduanes", "Metropolitan Manila"],
+    "Timor Leste": ["Dili Barat"],
+}
+NOTES = [
+    "School closures",
+    "Workplace closures",
+    "Cancellations of public events",
+    "Restrictions on gatherings",
+    "Public transport closures",
+    "Stay-at-home requirements",
+    "Internal movement restrictions",
+    "International travel controls",
+]
+
+_sources = {}
+
+
+def _names(defaults, prefix, n):
+    return defaults + [f"{prefix} {i}" for i in range(len(defaults), n)]
+
+
+def build(scale=1.0, seed=0):
+    """
+    Returns the raw facebook frame, government responses, typhoons and per-country
+    ``(adm1, adm2)`` boundary tables, sized by ``scale``.
+    """
+    rng = np.random.default_rng(seed)
+    polygons, boundaries = [], {}
+    for code, (n_provinces, n_polygons) in SIZES.items():
+        n_polygons = max(len(CITIES[code]), int(n_polygons * scale))
+        cities = _names(CITIES[code], f"{code} City", n_polygons)
+        ids = [f"{code}.{i}" for i in range(n_polygons)]
+        polygons.append(
+            pd.DataFrame({"country": code, "polygon_id": ids, "polygon_name": cities})
+        )
+        if code == "TLS":
+            continue
+        provinces = _names(
+            PROVINCES[code],
+            f"{code} Province",
+            max(len(PROVINCES[code]), int(n_provinces * scale)),
+        )
+        adm1 = pd.DataFrame(
+            {"GID_1": [f"{code}.{p}" for p in provinces], "VARNAME_1": provinces}
+        )
+        adm2 = pd.DataFrame(
+            {
+                "GID_1": [adm1["GID_1"][i % len(adm1)] for i in range(n_polygons)],
+                "GID_2": ids,
+                "VARNAME_2": cities,
+                "NAME_1": [provinces[i % len(provinces)] for i in range(n_polygons)],
+                "NAME_2": cities,
+            }
+        )
+        boundaries[code] = (adm1, adm2)
+    polygons = pd.concat(polygons, ignore_index=True)
+
+    fb = polygons.loc[polygons.index.repeat(len(DAYS))].reset_index(drop=True)
+    fb["ds"] = np.tile(DAYS, len(polygons))
+    fb["polygon_source"] = "GADM"
+    fb["all_day_bing_tiles_visited_relative_change"] = rng.normal(-0.1, 0.2, len(fb))
+    fb["all_day_ratio_single_tile_users"] = rng.uniform(0.1, 0.6, len(fb))
+    fb["baseline_name"] = "full_february"
+    fb["baseline_type"] = "DAY_OF_WEEK"
+    fb["Change in Mobility"] = (
+        fb["all_day_bing_tiles_visited_relative_change"] * 100
+    ).round(2)
+    fb["Staying Put"] = (fb["all_day_ratio_single_tile_users"] * 100).round(2)
+
+    g = pd.concat(
+        [
+            pd.DataFrame({"CountryName": name, "country": code, "ds": DAYS})
+            for name, code in mobility.c_dict.items()
+        ],
+        ignore_index=True,
+    )
+    g["Policy Stringency"] = rng.uniform(0, 100, len(g)).round(2)
+    for note in NOTES:
+        g[note] = "No new restrictions"
+    g["Stringency Metric"] = "Oxford Stringency Index"
+
+    pac = pd.DataFrame(
+        [
+            {"Country": country, "Province": province, "Event": f"Typhoon {i}"}
+            for country, provinces in AFFECTED.items()
+            for i, province in enumerate(provinces)
+        ]
+    )
+    pac["start_date"] = pd.Timestamp("2020-10-01") + pd.to_timedelta(
+        np.arange(len(pac)) * 7, unit="D"
+    )
+    pac["end_date"] = pac["start_date"] + pd.Timedelta(days=3)
+    pac.index.name = "id"
+    return fb, g, pac, boundaries
+
+
+def read_pacific_typhoons():
+    return _sources["pac"]
+
+
+def download_from_hdx():
+    return ["standin://2021", "standin://2020"]
+
+
+def government_response_reader():
+    return _sources["g"]
+
+
+def facebook_data_reader(urls):
+    return _sources["fb"]
+
+
+def facebook_data_filter(df, country):
+    """
+    Same joins as ``mobility.facebook_data_filter``, against the stand-in
+    boundary tables instead of the GADM shapefiles.
+    """
+    df = df[df["country"] == mobility.c_dict[country]]
+    if country != "Timor Leste":
+        adm1, adm2 = _sources["boundaries"][mobility.c_dict[country]]
+        df = pd.merge(
+            df,
+            adm2[["GID_1", "GID_2", "VARNAME_2", "NAME_1", "NAME_2"]],
+            left_on="polygon_id",
+            right_on="GID_2",
+        ).merge(adm1[["GID_1", "VARNAME_1"]], on="GID_1")
+    return df
+
+
+def install(scale=1.0, seed=0):
+    """
+    Builds the stand-in frames once per process and points the ``mobility``
+    readers at them.
+    """
+    if not _sources:
+        fb, g, pac, boundaries = build(scale, seed)
+        _sources.update(fb=fb, g=g, pac=pac, boundaries=boundaries)
+    mobility.read_pacific_typhoons = read_pacific_typhoons
+    mobility.download_from_hdx = download_from_hdx
+    mobility.government_response_reader = government_response_reader
+    mobility.facebook_data_reader = facebook_data_reader
+    mobility.facebook_data_filter = facebook_data_filter
@@ -0,0 +1,24 @@
+"""
+Streamlit entry point running ``streamlit.py`` against the stand-in sources.
+
+    streamlit run loadtest/standin_app.py
+
+``LOADTEST_SCALE`` and ``LOADTEST_SEED`` size and seed the stand-in data.
+"""
+import os
+import runpy
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for path in (HERE, ROOT):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import standin  # noqa: E402
+
+standin.install(
+    float(os.environ.get("LOADTEST_SCALE", "1")),
+    int(os.environ.get("LOADTEST_SEED", "0")),
+)
+runpy.run_path(os.path.join(ROOT, "streamlit.py"), run_name="__main__")
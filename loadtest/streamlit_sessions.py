@@ -0,0 +1,301 @@
+"""
+Load test driving one headless ``streamlit run`` instance with many sessions.
+
+The app is started on ``standin_app.py``, which runs ``streamlit.py`` against
+synthetic stand-in data (see ``standin.py``), so no network access is needed.
+Each simulated session talks to the server over its websocket like a browser
+tab: it sends a rerun with its widget states and waits for the script to finish,
+so all sessions share the one instance's memo and singleton caches. For every
+session count the p50/p95 rerun latency, throughput and server RSS are reported.
+
+    python loadtest/streamlit_sessions.py --sessions 1,2,4,8,16 --reruns 20
+
+The harness lives outside the repository root because the app script is itself
+called ``streamlit.py`` and would otherwise shadow the streamlit package.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "standin_app.py")
+VIZ_LABEL = "Select the type of disruption"
+
+
+def _is_multiselect(widget):
+    return widget.DESCRIPTOR.name == "MultiSelect"
+
+
+class Session:
+    """
+    Minimal Streamlit client keeping the widget states of one browser session.
+    """
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.widgets = {}
+        self.values = {}
+        self.messages = {}
+
+    async def connect(self):
+        self.conn = await websocket_connect(self.url, max_message_size=2**30)
+
+    def close(self):
+        self.conn.close()
+
+    async def rerun(self):
+        """
+        Reruns the script with the current widget states and returns the latency
+        and the number of exceptions the app displayed.
+        """
+        msg = BackMsg()
+        msg.rerun_script.SetInParent()
+        for widget_id, value in self.values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            if isinstance(value, list):
+                state.int_array_value.data.extend(value)
+            else:
+                state.int_value = value
+        self.widgets = {}
+        errors = 0
+        start = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await asyncio.wait_for(self.conn.read_message(), self.timeout)
+            if data is None:
+                raise ConnectionError("server closed the websocket")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            if fwd.WhichOneof("type") == "ref_hash":
+                fwd = self.messages[fwd.ref_hash]
+            elif fwd.metadata.cacheable:
+                self.messages[fwd.hash] = fwd
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in ("radio", "multiselect"):
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.id] = widget
+                elif element_type == "exception":
+                    errors += 1
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    errors += 1
+                break
+        elapsed = time.perf_counter() - start
+        # Like the frontend, keep states only for the widgets that were rendered.
+        self.values = {
+            widget_id: self.values.get(widget_id, self._initial(widget))
+            for widget_id, widget in self.widgets.items()
+        }
+        return elapsed, errors
+
+    @staticmethod
+    def _initial(widget):
+        value = widget.value if widget.set_value else widget.default
+        return list(value) if _is_multiselect(widget) else value
+
+    def widget(self, prefix):
+        for widget in self.widgets.values():
+            if widget.label.startswith(prefix):
+                return widget
+        return None
+
+    def change_selection(self, rng):
+        """
+        Applies one random user action: switching country, level, areas or metric.
+        """
+        actions = ["country", "metric"]
+        if self.widget("At what level") is not None:
+            actions.append("level")
+        areas = [
+            widget
+            for widget in self.widgets.values()
+            if _is_multiselect(widget)
+            and not widget.label.startswith(VIZ_LABEL)
+            and len(widget.options)
+        ]
+        if areas:
+            actions.append("areas")
+        action = rng.choice(actions)
+        if action == "areas":
+            widget = rng.choice(areas)
+            count = rng.randint(1, min(3, len(widget.options)))
+            self.values[widget.id] = sorted(
+                rng.sample(range(len(widget.options)), count)
+            )
+            return action
+        widget = self.widget(
+            {
+                "country": "Start by selecting a country",
+                "metric": "What metric",
+                "level": "At what level",
+            }[action]
+        )
+        current = self.values[widget.id]
+        self.values[widget.id] = rng.choice(
+            [i for i in range(len(widget.options)) if i != current]
+        )
+        return action
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, scale, seed, log):
+    """
+    Starts ``streamlit run`` on the stand-in app and waits until it is healthy.
+    """
+    env = dict(os.environ, LOADTEST_SCALE=str(scale), LOADTEST_SEED=str(seed))
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "streamlit",
+            "run",
+            APP,
+            "--server.headless=true",
+            f"--server.port={port}",
+            "--server.fileWatcherType=none",
+            "--browser.gatherUsageStats=false",
+        ],
+        cwd=HERE,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("streamlit exited during startup")
+        try:
+            health = f"http://127.0.0.1:{port}/_stcore/health"
+            with urllib.request.urlopen(health) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("streamlit did not become healthy")
+
+
+def rss_mb(pid):
+    """
+    Current and peak resident set size of ``pid``, or NaN where /proc is not
+    available.
+    """
+    rss = {"VmRSS": float("nan"), "VmHWM": float("nan")}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in rss:
+                    rss[name] = int(value.split()[0]) / 2**10
+    except OSError:
+        pass
+    return rss["VmRSS"], rss["VmHWM"]
+
+
+async def load_step(url, sessions, reruns, timeout, seed):
+    clients = [Session(url, timeout) for _ in range(sessions)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    await asyncio.gather(*(client.rerun() for client in clients))
+    latencies, errors = [], 0
+
+    async def drive(client, rng):
+        nonlocal errors
+        for _ in range(reruns):
+            client.change_selection(rng)
+            elapsed, failed = await client.rerun()
+            latencies.append(elapsed)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(drive(client, random.Random(seed + i)) for i, client in enumerate(clients))
+    )
+    wall = time.perf_counter() - start
+    for client in clients:
+        client.close()
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "p50_ms": np.percentile(latencies, 50) * 1000,
+        "p95_ms": np.percentile(latencies, 95) * 1000,
+        "reruns_per_s": len(latencies) / wall,
+        "errors": errors,
+    }
+
+
+async def main(args):
+    port = args.port or free_port()
+    with open(args.server_log, "wb") as log:
+        server = start_server(port, args.scale, args.seed, log)
+        try:
+            url = f"ws://127.0.0.1:{port}/_stcore/stream"
+            print(
+                f"{'sessions':>8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} "
+                f"{'reruns/s':>9} {'RSS MB':>8} {'peak MB':>8} {'errors':>7}",
+                flush=True,
+            )
+            for sessions in [int(n) for n in args.sessions.split(",")]:
+                try:
+                    r = await load_step(
+                        url, sessions, args.reruns, args.timeout, args.seed
+                    )
+                except (ConnectionError, OSError):
+                    if server.poll() is None:
+                        raise
+                    # Typically the OS killing the server for running out of memory.
+                    print(
+                        f"{sessions:>8} server exited with code {server.returncode}",
+                        flush=True,
+                    )
+                    return 1
+                rss, peak = rss_mb(server.pid)
+                print(
+                    f"{r['sessions']:>8} {r['reruns']:>7} {r['p50_ms']:>9.1f} "
+                    f"{r['p95_ms']:>9.1f} {r['reruns_per_s']:>9.2f} "
+                    f"{rss:>8.1f} {peak:>8.1f} {r['errors']:>7}",
+                    flush=True,
+                )
+            return 0
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--sessions", default="1,2,4,8,16", help="Comma-separated session counts."
+    )
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns per session.")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Stand-in data size relative to the real sources.",
+    )
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--server-log", default=os.devnull)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,275 @@
+import hashlib
+import io
+import os
+from io import BytesIO
+from urllib.request import urlopen
+from zipfile import ZipFile
+
+import geopandas as gpd
+import pandas as pd
+import requests
+from hdx.api.configuration import Configuration
+from hdx.data.dataset import Dataset
+
+try:
+    Configuration.create(hdx_site="prod", hdx_read_only=True, user_agent="WBG")
+except:
+    pass
+
+BOUNDARIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "boundaries")
+
+# ----------COUNTRY & METRIC DICTIONARIES----------
+c_dict = {"Vietnam": "VNM", "the Philippines": "PHL", "Timor Leste": "TLS"}
+metric_dict = {
+    "Mobility change": "Change in Mobility",
+    "Staying put/sheltering in place": "Staying Put",
+}
+level_columns = {
+    "Vietnam": {
+        "National level": "country",
+        "Provincial level": "VARNAME_1",
+        "City/municipality level": "VARNAME_2",
+    },
+    "the Philippines": {
+        "National level": "country",
+        "Provincial level": "NAME_1",
+        "City/municipality level": "NAME_2",
+    },
+    "Timor Leste": {
+        "National level": "country_x",
+        "Provincial level": "polygon_name",
+        "City/municipality level": "polygon_name",
+    },
+}
+
+# ----------READING FACEBOOK DATA--------------------
+def read_pacific_typhoons():
+    r = requests.get(
+        "https://docs.google.com/spreadsheets/d/e/2PACX-1vRFJfCoAhf_no2vxzaTLMgqAqcx9XpNmX5HQOY2sX5BsNdopYsSZUoAV7lc5mCfnWTpmc5IN_4QNXBW/pub?output=csv"
+    )
+    pac = r.content
+    pac = pd.read_csv(
+        BytesIO(pac),
+        index_col=0,
+        parse_dates=["start_date", "end_date"],
+        low_memory=False,
+    )
+    return pac
+
+
+def download_from_hdx():
+    """
+    Function to download latest movement range maps from HDX.
+    """
+    names = Dataset.get_resources(Dataset.read_from_hdx("movement-range-maps"))[
+        1:3
+    ]  # ['download_url']
+    urls = [i["download_url"] for i in names]
+    return urls
+
+
+def government_response_reader():
+    url1 = "https://github.com/OxCGRT/covid-policy-tracker/raw/master/data/OxCGRT_withnotes_2020.csv"
+    url2 = "https://github.com/OxCGRT/covid-policy-tracker/raw/master/data/OxCGRT_withnotes_2021.csv"
+    s1 = requests.get(url1).content
+    s2 = requests.get(url2).content
+    c1 = pd.read_csv(io.StringIO(s1.decode("utf-8")), low_memory=False)
+    c2 = pd.read_csv(io.StringIO(s2.decode("utf-8")), low_memory=False)
+    c = pd.concat([c1, c2], ignore_index=True)
+    # c = pd.read_csv(io.StringIO(s.decode("utf-8")), low_memory=False)
+    c = c[
+        [
+            "CountryName",
+            "CountryCode",
+            "Date",
+            "StringencyIndex",
+            "C1_Notes",
+            "C2_Notes",
+            "C3_Notes",
+            "C4_Notes",
+            "C5_Notes",
+            "C6_Notes",
+            "C7_Notes",
+            "C8_Notes",
+        ]
+    ]
+    c.columns = [
+        "CountryName",
+        "country",
+        "ds",
+        "Policy Stringency",
+        "School closures",
+        "Workplace closures",
+        "Cancellations of public events",
+        "Restrictions on gatherings",
+        "Public transport closures",
+        "Stay-at-home requirements",
+        "Internal movement restrictions",
+        "International travel controls",
+    ]
+    char = 300
+    c["ds"] = pd.to_datetime(c["ds"], format="%Y%m%d")
+    c["Stringency Metric"] = "Oxford Stringency Index"
+    c["School closures"] = (
+        c["School closures"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    c["Workplace closures"] = (
+        c["Workplace closures"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    c["Cancellations of public events"] = (
+        c["Cancellations of public events"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    c["Restrictions on gatherings"] = (
+        c["Restrictions on gatherings"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    c["Public transport closures"] = (
+        c["Public transport closures"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    c["Stay-at-home requirements"] = (
+        c["Stay-at-home requirements"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    c["Internal movement restrictions"] = (
+        c["Internal movement restrictions"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    c["International travel controls"] = (
+        c["International travel controls"]
+        .fillna("No new restrictions")
+        .apply(lambda x: x[:char].split(". ")[0])
+    )
+    return c
+
+
+def facebook_data_reader(urls):
+    """
+    Reads the 2020 and 2021 movement range files at ``urls``, as returned by
+    ``download_from_hdx``.
+    """
+    url20 = urls[1]
+    url21 = urls[0]
+    print(url20)
+    print(url21)
+    y20 = urlopen(url20)
+    y21 = urlopen(url21)
+    zipfile20 = ZipFile(BytesIO(y20.read()))
+    zipfile21 = ZipFile(BytesIO(y21.read()))
+    file20 = [i for i in zipfile20.namelist() if "movement" in i][0]
+    file21 = [i for i in zipfile21.namelist() if "movement" in i][0]
+    df20 = pd.read_csv(zipfile20.open(file20), sep="\t", low_memory=False)
+    df21 = pd.read_csv(zipfile21.open(file21), sep="\t", low_memory=False)
+    df = pd.concat([df20, df21], ignore_index=True)
+    df = df[df["country"].isin(["VNM", "TLS", "PHL"])]
+    df["ds"] = pd.to_datetime(df["ds"])
+    df["Change in Mobility"] = (
+        df["all_day_bing_tiles_visited_relative_change"] * 100
+    ).round(2)
+    df["Staying Put"] = (df["all_day_ratio_single_tile_users"] * 100).round(2)
+    return df
+
+
+def data_version(urls, g, pac):
+    """
+    Short hash identifying the loaded sources, so anything cached from them is
+    dropped once they are refreshed.
+    """
+    version = (tuple(urls), str(g["ds"].max()), len(pac))
+    return hashlib.sha1(repr(version).encode("utf-8")).hexdigest()[:16]
+
+
+def facebook_data_filter(df, country):
+    df = df[df["country"] == c_dict[country]]
+    if country != "Timor Leste":
+        adm1 = gpd.read_file(
+            f"{BOUNDARIES}/{c_dict[country]}/gadm36_{c_dict[country]}_1.shp"
+        )
+        adm2 = gpd.read_file(
+            f"{BOUNDARIES}/{c_dict[country]}/gadm36_{c_dict[country]}_2.shp"
+        )
+        df = pd.merge(
+            df,
+            adm2[["GID_1", "GID_2", "VARNAME_2", "NAME_1", "NAME_2"]],
+            left_on="polygon_id",
+            right_on="GID_2",
+        ).merge(adm1[["GID_1", "VARNAME_1"]], on="GID_1")
+    # else:
+    # adm1 = gpd.read_file(f'boundaries/TLS/tls_admbnda_adm1_who_ocha_20200911.shp')
+    # adm2 = gpd.read_file(f'boundaries/TLS/tls_admbnda_adm2_who_ocha_20200911.shp')
+    return df
+
+
+# ----------AGGREGATING SERIES-----------------------------
+def aggregate_areas(df, g, pac, country, level, area):
+    """
+    Daily mean of each selected area at the given administrative level, joined
+    with the country's policy stringency.
+    """
+    column = level_columns[country][level]
+    data = df[df[column].isin(area)]
+    pac = pac[
+        pac["Province"].isin(data[level_columns[country]["Provincial level"]].unique())
+    ]
+    data = data.groupby([column, "ds"]).mean().reset_index()
+    cols = [i for i in data.columns if "country" not in i]
+    data = pd.merge(data[cols], g[g["country"] == c_dict[country]], on="ds")
+    return data, pac
+
+
+def aggregate_comparison_groups(
+    df, g, pac, country, prov1, cities_in, prov2, cities_ex
+):
+    """
+    Series for comparison group 1 (the selected provinces and cities) against
+    comparison group 2 (everything outside the second selection).
+    """
+    prov_column = level_columns[country]["Provincial level"]
+    city_column = level_columns[country]["City/municipality level"]
+    df1 = df[(df[prov_column].isin(prov1)) | (df[city_column].isin(cities_in))]
+    df2 = df[~((df[prov_column].isin(prov2)) | (df[city_column].isin(cities_ex)))]
+    in_1 = pac["Province"].isin(prov1)
+    in_2 = pac["Province"].isin(prov2)
+    pac = pac[in_1 | in_2]
+    df1 = (
+        df1.set_index("ds")
+        .resample("1D")
+        .mean()
+        .reset_index()
+        .set_index("ds")
+        .resample("7D")
+        .mean()
+        .reset_index()
+    )
+    df1["status"] = "Group 1"
+
+    df2 = df2.set_index("ds").resample("1D").mean().reset_index()
+    df2["status"] = "Group 2"
+    data = pd.concat([df1, df2])
+    data = pd.merge(data, g[g["country"] == c_dict[country]], on="ds")
+    return data, pac
+
+
+def aggregate_timor_leste(df, g, pac, area):
+    """
+    Daily mean of each selected Dili area, joined with Timor Leste's policy stringency.
+    """
+    data = (
+        df[df["polygon_name"].isin(area)]
+        .groupby(["polygon_name", "ds"])
+        .mean()
+        .reset_index()
+    )
+    data = pd.merge(data, g[g["country"] == c_dict["Timor Leste"]], on="ds")
+    pac = pac[pac["Province"].isin(area)]
+    return data, pac
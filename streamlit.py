@@ -1,163 +1,24 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from zipfile import ZipFile
-import requests
 import altair as alt
 import base64
-import io
 import datetime
 from vega_datasets import data
-import geopandas as gpd
-from io import BytesIO
-from urllib.request import urlopen
-from hdx.data.dataset import Dataset
-from hdx.utilities.easy_logging import setup_logging
-from hdx.api.configuration import Configuration
-try:
-    Configuration.create(hdx_site="prod", hdx_read_only=True, user_agent="WBG")
-except:
-    pass
+from cache import LRUCache
+import charts
+import mobility
+from mobility import c_dict, metric_dict, level_columns
 
 # ----------READING FACEBOOK DATA--------------------
-@st.experimental_memo
-def read_pacific_typhoons():
-    r = requests.get(
-        "https://docs.google.com/spreadsheets/d/e/2PACX-1vRFJfCoAhf_no2vxzaTLMgqAqcx9XpNmX5HQOY2sX5BsNdopYsSZUoAV7lc5mCfnWTpmc5IN_4QNXBW/pub?output=csv"
-    )
-    pac = r.content
-    pac = pd.read_csv(
-        BytesIO(pac),
-        index_col=0,
-        parse_dates=["start_date", "end_date"],
-        low_memory=False,
-    )
-    return pac
-
-
-@st.experimental_memo
-def download_from_hdx():
-    """
-    Function to download latest movement range maps from HDX.
-    """
-    names = Dataset.get_resources(Dataset.read_from_hdx("movement-range-maps"))[
-        1:3
-    ]  # ['download_url']
-    urls = [i["download_url"] for i in names]
-    return urls
-
-
-@st.experimental_memo
-def government_response_reader():
-    url1 = "https://github.com/OxCGRT/covid-policy-tracker/raw/master/data/OxCGRT_withnotes_2020.csv"
-    url2 = "https://github.com/OxCGRT/covid-policy-tracker/raw/master/data/OxCGRT_withnotes_2021.csv"
-    s1 = requests.get(url1).content
-    s2 = requests.get(url2).content
-    c1 = pd.read_csv(io.StringIO(s1.decode("utf-8")), low_memory=False)
-    c2 = pd.read_csv(io.StringIO(s2.decode("utf-8")), low_memory=False)
-    c = pd.concat([c1, c2], ignore_index=True)
-    #c = pd.read_csv(io.StringIO(s.decode("utf-8")), low_memory=False)
-    c = c[
-        [
-            "CountryName",
-            "CountryCode",
-            "Date",
-            "StringencyIndex",
-            "C1_Notes",
-            "C2_Notes",
-            "C3_Notes",
-            "C4_Notes",
-            "C5_Notes",
-            "C6_Notes",
-            "C7_Notes",
-            "C8_Notes",
-        ]
-    ]
-    c.columns = [
-        "CountryName",
-        "country",
-        "ds",
-        "Policy Stringency",
-        "School closures",
-        "Workplace closures",
-        "Cancellations of public events",
-        "Restrictions on gatherings",
-        "Public transport closures",
-        "Stay-at-home requirements",
-        "Internal movement restrictions",
-        "International travel controls",
-    ]
-    char = 300
-    c["ds"] = pd.to_datetime(c["ds"], format="%Y%m%d")
-    c["Stringency Metric"] = "Oxford Stringency Index"
-    c["School closures"] = (
-        c["School closures"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    c["Workplace closures"] = (
-        c["Workplace closures"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    c["Cancellations of public events"] = (
-        c["Cancellations of public events"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    c["Restrictions on gatherings"] = (
-        c["Restrictions on gatherings"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    c["Public transport closures"] = (
-        c["Public transport closures"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    c["Stay-at-home requirements"] = (
-        c["Stay-at-home requirements"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    c["Internal movement restrictions"] = (
-        c["Internal movement restrictions"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    c["International travel controls"] = (
-        c["International travel controls"]
-        .fillna("No new restrictions")
-        .apply(lambda x: x[:char].split(". ")[0])
-    )
-    return c
+read_pacific_typhoons = st.experimental_memo(mobility.read_pacific_typhoons)
+download_from_hdx = st.experimental_memo(mobility.download_from_hdx)
+government_response_reader = st.experimental_memo(mobility.government_response_reader)
+facebook_data_reader = st.experimental_memo(mobility.facebook_data_reader)
 
 
-@st.experimental_memo
-def facebook_data_reader():
-    url20 = download_from_hdx()[1]
-    url21 = download_from_hdx()[0]
-    print(url20)
-    print(url21)
-    y20 = urlopen(url20)
-    y21 = urlopen(url21)
-    zipfile20 = ZipFile(BytesIO(y20.read()))
-    zipfile21 = ZipFile(BytesIO(y21.read()))
-    file20 = [i for i in zipfile20.namelist() if "movement" in i][0]
-    file21 = [i for i in zipfile21.namelist() if "movement" in i][0]
-    df20 = pd.read_csv(zipfile20.open(file20), sep="\t", low_memory=False)
-    df21 = pd.read_csv(zipfile21.open(file21), sep="\t", low_memory=False)
-    df = pd.concat([df20, df21], ignore_index=True)
-    df = df[df["country"].isin(["VNM", "TLS", "PHL"])]
-    df["ds"] = pd.to_datetime(df["ds"])
-    df["Change in Mobility"] = (
-        df["all_day_bing_tiles_visited_relative_change"] * 100
-    ).round(2)
-    df["Staying Put"] = (df["all_day_ratio_single_tile_users"] * 100).round(2)
-    return df
-
-
-fb = facebook_data_reader()
+urls = download_from_hdx()
+fb = facebook_data_reader(urls)
 pac = read_pacific_typhoons().reset_index()
 pac["_y"] = 0
 pac["y"] = 100
@@ -190,21 +51,11 @@ metric = st.sidebar.radio(
 )
 
 
-if country == "Vietnam":
-    nat_column = "country"
-    prov_column = "VARNAME_1"
-    city_column = "VARNAME_2"
-elif country == "Timor Leste":
-    nat_column = "country_x"
-    prov_column = "polygon_name"
-    city_column = "polygon_name"
-else:
-    nat_column = "country"
-    prov_column = "NAME_1"
-    city_column = "NAME_2"
+nat_column = level_columns[country]["National level"]
+prov_column = level_columns[country]["Provincial level"]
+city_column = level_columns[country]["City/municipality level"]
 
 # ----------COUNTRY & DEFAULT DICTIONARIES----------
-c_dict = {"Vietnam": "VNM", "the Philippines": "PHL", "Timor Leste": "TLS"}
 default_provinces = {
     "Vietnam": ["Ha Noi", "Thua Thien Hue", "Da Nang"],
     "the Philippines": ["Metropolitan Manila", "Albay"],
@@ -215,10 +66,6 @@ default_cities = {
     "the Philippines": ["Quezon City", "Tuguegarao City", "Barili"],
     "Timor Leste": "Dili Barat",
 }
-metric_dict = {
-    "Mobility change": "Change in Mobility",
-    "Staying put/sheltering in place": "Staying Put",
-}
 metric_ylabel = {
     "Mobility change": " Change in Mobility (from baseline) (%)",
     "Staying put/sheltering in place": "Facebook users staying put (%)",
@@ -332,26 +179,7 @@ typhoon_dict = {
     "Timor Leste": pd.DataFrame({"Date": ["2020-3-13"], "Event": ["Dili Flooding"]}),
 }
 # ----------FILTERING DATA-----------------------------
-@st.experimental_memo
-def facebook_data_filter(df, country):
-    df = df[df["country"] == c_dict[country]]
-    if country != "Timor Leste":
-        adm1 = gpd.read_file(
-            f"boundaries/{c_dict[country]}/gadm36_{c_dict[country]}_1.shp"
-        )
-        adm2 = gpd.read_file(
-            f"boundaries/{c_dict[country]}/gadm36_{c_dict[country]}_2.shp"
-        )
-        df = pd.merge(
-            df,
-            adm2[["GID_1", "GID_2", "VARNAME_2", "NAME_1", "NAME_2"]],
-            left_on="polygon_id",
-            right_on="GID_2",
-        ).merge(adm1[["GID_1", "VARNAME_1"]], on="GID_1")
-    # else:
-    # adm1 = gpd.read_file(f'boundaries/TLS/tls_admbnda_adm1_who_ocha_20200911.shp')
-    # adm2 = gpd.read_file(f'boundaries/TLS/tls_admbnda_adm2_who_ocha_20200911.shp')
-    return df
+facebook_data_filter = st.experimental_memo(mobility.facebook_data_filter)
 
 
 df = facebook_data_filter(fb, country)
@@ -474,7 +302,17 @@ def plotting(
     return chart
 
 
+# ----------CACHING BUILT CHART SPECS-----------------------------
+@st.experimental_singleton
+def chart_spec_cache():
+    """
+    Process-wide LRU cache of serialized Vega-Lite specs, shared by all sessions.
+    """
+    return LRUCache(max_entries=128, max_bytes=256 * 1024 * 1024)
+
+
 g = government_response_reader()
+version = mobility.data_version(urls, g, pac)
 # ----------SELECTION OF LEVEL OF ANALYSIS----------------------
 st.header(f"Analysis of mobility changes in {country}.")
 viz = st.multiselect(
@@ -544,13 +382,8 @@ if country != "Timor Leste":
                 default=analysis_level_default[analysis][country],
                 help="Names of administrative units are taken from the [Database of Global Administrative Areas (GADM)](https://gadm.org/download_country_v3.html). Note that some cities, e.g. Hanoi, Metropolitan Manila, and Dili, show up in the provinces list because they are centrally-administered units.",
             )
-        data = df[df[column].isin(area)]
-        pac = pac[
-            pac["Province"].isin(data[analysis_level["Provincial level"]].unique())
-        ]
-        data = data.groupby([column, "ds"]).mean().reset_index()
-        cols = [i for i in data.columns if "country" not in i]
-        data = pd.merge(data[cols], g[g["country"] == c_dict[country]], on="ds")
+        level, areas = analysis, area
+        data, pac = mobility.aggregate_areas(df, g, pac, country, analysis, area)
         color = alt.Color(
             column,
             legend=alt.Legend(title=metric_ylabel_full[metric], orient="bottom"),
@@ -590,10 +423,6 @@ if country != "Timor Leste":
             ),
             default=default_cities1[country],
         )
-        df1 = df[
-            (df[analysis_level["Provincial level"]].isin(prov1))
-            | (df[analysis_level["City/municipality level"]].isin(cities_in))
-        ]
 
         ## -----------COMPARISON GROUP 2--------------------
         default_prov2 = {
@@ -626,32 +455,10 @@ if country != "Timor Leste":
             ),
             default=default_cities2[country],
         )
-        df2 = df[
-            ~(
-                (df[analysis_level["Provincial level"]].isin(prov2))
-                | (df[analysis_level["City/municipality level"]].isin(cities_ex))
-            )
-        ]
-        in_1 = pac["Province"].isin(prov1)
-        in_2 = pac["Province"].isin(prov2)
-        pac = pac[in_1 | in_2]
-        # chg
-        df1 = (
-            df1.set_index("ds")
-            .resample("1D")
-            .mean()
-            .reset_index()
-            .set_index("ds")
-            .resample("7D")
-            .mean()
-            .reset_index()
+        level, areas = analysis, (prov1, cities_in, prov2, cities_ex)
+        data, pac = mobility.aggregate_comparison_groups(
+            df, g, pac, country, prov1, cities_in, prov2, cities_ex
         )
-        df1["status"] = "Group 1"
-
-        df2 = df2.set_index("ds").resample("1D").mean().reset_index()
-        df2["status"] = "Group 2"
-        data = pd.concat([df1, df2])
-        data = pd.merge(data, g[g["country"] == c_dict[country]], on="ds")
         base = alt.Chart(data).encode(x="ds")
         line = base.mark_line(color="red").encode(y="PolicyValue:Q")
         color = alt.Color(
@@ -669,18 +476,21 @@ else:
         options=["Dili Barat", "Dili Timur"],
         default=["Dili Barat", "Dili Timur"],
     )
-    data = (
-        df[df["polygon_name"].isin(analysis)]
-        .groupby(["polygon_name", "ds"])
-        .mean()
-        .reset_index()
-    )
-    data = pd.merge(data, g[g["country"] == c_dict[country]], on="ds")
-    pac = pac[pac["Province"].isin(analysis)]
+    level, areas = "Area", analysis
+    data, pac = mobility.aggregate_timor_leste(df, g, pac, analysis)
     color = alt.Color("polygon_name", legend=alt.Legend(title="Area"))
     plot_slot = st.empty()
     # st.write(plotting(data,metric,color=color,country=country,viz=viz,pac=pac))
-plot_slot.write(plotting(data, metric, color=color, country=country, viz=viz, pac=pac))
+plot_slot.vega_lite_chart(
+    charts.cached_chart_spec(
+        chart_spec_cache(),
+        charts.chart_key(version, country, level, areas, metric, viz),
+        lambda: plotting(data, metric, color=color, country=country, viz=viz, pac=pac),
+    )
+)
+if "debug" in st.experimental_get_query_params():
+    with st.sidebar.expander("Chart cache"):
+        st.json(chart_spec_cache().stats())
 # ----------DOWNLOADING DATA----------------------
 
 
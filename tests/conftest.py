@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Appended rather than prepended: the app script at the root is called
+# streamlit.py and must not shadow the streamlit package.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mobility  # noqa: E402
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    """
+    Small stand-in for the ingested sources: two Vietnamese provinces with two
+    cities each, plus both Dili areas, over one month.
+    """
+    ds = pd.date_range("2020-03-01", periods=30)
+    polygons = pd.DataFrame(
+        {
+            "country": ["VNM"] * 4 + ["TLS"] * 2,
+            "polygon_name": ["Hue", "Phu Vang", "Ba Dinh", "Dong Da"]
+            + ["Dili Barat", "Dili Timur"],
+            "VARNAME_1": ["Thua Thien Hue"] * 2 + ["Ha Noi"] * 2 + [None] * 2,
+            "VARNAME_2": ["Hue", "Phu Vang", "Ba Dinh", "Dong Da", None, None],
+        }
+    )
+    fb = polygons.loc[polygons.index.repeat(len(ds))].reset_index(drop=True)
+    fb["ds"] = np.tile(ds, len(polygons))
+    fb["Change in Mobility"] = np.arange(len(fb), dtype=float)
+    fb["Staying Put"] = 50.0
+    g = pd.DataFrame(
+        {
+            "country": np.repeat(["VNM", "PHL", "TLS"], len(ds)),
+            "ds": np.tile(ds, 3),
+            "Policy Stringency": 40.0,
+        }
+    )
+    pac = pd.DataFrame(
+        {
+            "Country": ["Vietnam"],
+            "Province": ["Thua Thien Hue"],
+            "Event": ["Typhoon Molave"],
+        }
+    )
+    monkeypatch.setattr(
+        mobility,
+        "facebook_data_filter",
+        lambda df, country: df[df["country"] == mobility.c_dict[country]],
+    )
+    return fb, g, pac, "test"
@@ -0,0 +1,177 @@
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api
+
+SERIES = "/series?country=VNM&level=provincial&area=Ha%20Noi&area=Thua%20Thien%20Hue"
+
+
+@pytest.fixture
+def get(sources):
+    server = api.make_server(port=0, store=api.MobilityData(loader=lambda: sources))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def get(path, **headers):
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_port}{path}", headers=headers
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    yield get
+    server.shutdown()
+    server.server_close()
+
+
+def test_series_json(get):
+    status, headers, body = get(SERIES + "&start=2020-03-11")
+    assert status == 200
+    assert headers["Content-Type"] == "application/json"
+    records = json.loads(body)
+    assert len(records) == 2 * 20
+    assert set(records[0]) == {"ds", "area", "value", "policy_stringency"}
+    assert {r["area"] for r in records} == {"Ha Noi", "Thua Thien Hue"}
+
+
+def test_series_timezone_aware_dates(get):
+    status, _, body = get(SERIES + "&start=2020-03-11T00:00:00Z")
+    assert status == 200
+    assert len(json.loads(body)) == 2 * 20
+
+
+def test_series_arrow(get):
+    pa = pytest.importorskip("pyarrow")
+    status, headers, body = get(SERIES + "&format=arrow")
+    assert status == 200
+    assert headers["Content-Type"] == api.ARROW_MIME
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.column_names == ["ds", "area", "value", "policy_stringency"]
+    assert table.num_rows == 2 * 30
+
+    status, headers, _ = get(SERIES, Accept=api.ARROW_MIME)
+    assert headers["Content-Type"] == api.ARROW_MIME
+
+    accept = f"{api.ARROW_MIME};q=0, application/json"
+    status, headers, _ = get(SERIES, Accept=accept)
+    assert headers["Content-Type"] == "application/json"
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    ["{etag}", '"other", {etag}', "*", "{strong}"],
+)
+def test_series_not_modified(get, if_none_match):
+    _, headers, _ = get(SERIES)
+    etag = headers["ETag"]
+    header = if_none_match.format(etag=etag, strong=etag[2:])
+    status, headers2, body = get(SERIES, **{"If-None-Match": header})
+    assert status == 304
+    assert body == b""
+    for name in ("ETag", "Vary", "Cache-Control"):
+        assert headers2[name] == headers[name]
+
+
+def test_series_modified(get):
+    status, _, _ = get(SERIES, **{"If-None-Match": 'W/"other"'})
+    assert status == 200
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, gzipped",
+    [
+        ("gzip", True),
+        ("deflate, gzip;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("*, gzip;q=0", False),
+        ("deflate", False),
+        ("x-gzip-like", False),
+    ],
+)
+def test_series_gzip(get, accept_encoding, gzipped):
+    _, _, plain = get(SERIES)
+    status, headers, body = get(SERIES, **{"Accept-Encoding": accept_encoding})
+    assert status == 200
+    if gzipped:
+        assert headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(body) == plain
+    else:
+        assert "Content-Encoding" not in headers
+        assert body == plain
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "country=XXX&area=Ha%20Noi",
+        "country=VNM&level=county&area=Ha%20Noi",
+        "country=VNM&level=provincial&metric=speed&area=Ha%20Noi",
+        "country=VNM&level=provincial",
+        "country=VNM&level=provincial&area=Ha%20Noi&start=yesterday-ish",
+    ],
+)
+def test_series_bad_request(get, query):
+    status, headers, body = get(f"/series?{query}")
+    assert status == 400
+    assert "error" in json.loads(body)
+
+
+def test_loader_failure_is_server_error(sources):
+    def loader():
+        raise OSError("HDX is down")
+
+    server = api.make_server(port=0, store=api.MobilityData(loader=loader))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}{SERIES}")
+        assert e.value.code == 500
+        assert json.loads(e.value.read()) == {"error": "internal server error"}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_load_sources_version(sources, monkeypatch):
+    fb, g, pac, _ = sources
+    urls = ["https://example.org/2021.zip", "https://example.org/2020.zip"]
+    monkeypatch.setattr(api.mobility, "download_from_hdx", lambda: urls)
+    monkeypatch.setattr(api.mobility, "facebook_data_reader", lambda urls: fb)
+    monkeypatch.setattr(api.mobility, "government_response_reader", lambda: g)
+    monkeypatch.setattr(api.mobility, "read_pacific_typhoons", lambda: pac)
+    version = api.load_sources()[3]
+    assert version == api.mobility.data_version(urls, g, pac.reset_index())
+    assert version != api.mobility.data_version(urls[::-1], g, pac)
+
+
+def test_areas(get):
+    status, _, body = get("/areas?country=Vietnam&level=city")
+    assert status == 200
+    assert json.loads(body) == ["Ba Dinh", "Dong Da", "Hue", "Phu Vang"]
+    _, _, body = get("/areas?country=TLS")
+    assert json.loads(body) == ["Dili Barat", "Dili Timur"]
+
+
+def test_stats(get):
+    get(SERIES)
+    get(SERIES)
+    status, headers, body = get("/stats")
+    assert status == 200
+    assert headers["Cache-Control"] == "no-store"
+    stats = json.loads(body)
+    assert stats["version"] == "test"
+    assert stats["cache"]["hits"] == 1
+    assert stats["cache"]["misses"] == 1
+
+
+def test_not_found(get):
+    assert get("/nope")[0] == 404
@@ -0,0 +1,45 @@
+from cache import LRUCache
+
+
+def test_evicts_least_recently_used_by_entries():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_bytes():
+    cache = LRUCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"123")
+    assert "a" not in cache
+    assert len(cache) == 2
+    assert cache.stats()["bytes"] == 8
+
+
+def test_skips_values_larger_than_the_cache():
+    cache = LRUCache(max_bytes=4)
+    cache.put("a", "12345")
+    assert len(cache) == 0
+
+
+def test_stats_and_clear():
+    cache = LRUCache()
+    assert cache.get_or_create("a", lambda: "1") == "1"
+    assert cache.get_or_create("a", lambda: "2") == "1"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    cache.clear()
+    assert cache.stats() == {
+        "entries": 0,
+        "bytes": 0,
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+        "hit_rate": 0.0,
+    }
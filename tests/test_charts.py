@@ -0,0 +1,74 @@
+import altair as alt
+import pandas as pd
+import pytest
+
+import charts
+from cache import LRUCache
+
+VIEW = {
+    "version": "v1",
+    "country": "Vietnam",
+    "level": "Provincial level",
+    "areas": ["Ha Noi", "Da Nang"],
+    "metric": "Mobility change",
+    "viz": ["COVID-19 Restrictions", "Pacific Typhoons"],
+}
+
+
+class Plotting:
+    """
+    Stand-in for the app's ``plotting``, counting how often a chart is built.
+    """
+
+    def __init__(self, rows=3):
+        self.calls = 0
+        self.data = pd.DataFrame({"ds": range(rows), "value": range(rows)})
+
+    def __call__(self):
+        self.calls += 1
+        return alt.Chart(self.data).mark_line().encode(x="ds", y="value")
+
+
+def test_repeated_key_skips_plotting():
+    cache, plotting = LRUCache(), Plotting()
+    first = charts.cached_chart_spec(cache, charts.chart_key(**VIEW), plotting)
+    second = charts.cached_chart_spec(cache, charts.chart_key(**VIEW), plotting)
+    assert plotting.calls == 1
+    assert first == second
+    assert cache.stats()["hits"] == 1
+
+
+def test_selection_order_does_not_change_key():
+    reordered = dict(VIEW, areas=["Da Nang", "Ha Noi"], viz=VIEW["viz"][::-1])
+    assert charts.chart_key(**reordered) == charts.chart_key(**VIEW)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"version": "v2"},
+        {"country": "the Philippines"},
+        {"level": "City/municipality level"},
+        {"areas": ["Ha Noi"]},
+        {"metric": "Staying put/sheltering in place"},
+        {"viz": ["COVID-19 Restrictions"]},
+    ],
+)
+def test_changed_view_rebuilds(change):
+    cache, plotting = LRUCache(), Plotting()
+    charts.cached_chart_spec(cache, charts.chart_key(**VIEW), plotting)
+    charts.cached_chart_spec(cache, charts.chart_key(**dict(VIEW, **change)), plotting)
+    assert plotting.calls == 2
+    assert len(cache) == 2
+
+
+def test_custom_level_keys_on_each_group():
+    groups = (["Da Nang"], ["Hue"], ["Ha Noi"], [])
+    custom = dict(VIEW, level="Custom", areas=groups)
+    moved = dict(custom, areas=(["Da Nang"], [], ["Ha Noi"], ["Hue"]))
+    assert charts.chart_key(**custom) != charts.chart_key(**moved)
+
+
+def test_builds_charts_over_the_altair_row_limit():
+    spec = charts.cached_chart_spec(LRUCache(), "key", Plotting(rows=6000))
+    assert len(spec["datasets"][spec["data"]["name"]]) == 6000